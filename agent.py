@@ -1,22 +1,56 @@
 import os
 import sys
+import glob
 import json
+import asyncio
+import hashlib
 import argparse
-from typing import Any, Dict, List
+import functools
+import pathlib
+from typing import Any, Dict, List, Optional, Tuple
 from unittest import result
 
-from openai import OpenAI
+import httpx
+import orjson
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    InternalServerError,
+    RateLimitError,
+)
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 from dotenv import load_dotenv
 
+from imo_cache import CACHE_DIR, write_atomic
+
 # Try LaTeX → text conversion (CLI-friendly)
 try:
     from pylatexenc.latex2text import LatexNodes2Text
-    def latex_to_text(s: str) -> str:
-        return LatexNodes2Text().latex_to_text(s)
+    _L2T = LatexNodes2Text()  # building the macro catalog is the expensive part; do it once
+
+    @functools.lru_cache(maxsize=4096)
+    def _convert_latex(s: str) -> str:
+        return _L2T.latex_to_text(s)
 except Exception:
-    def latex_to_text(s: str) -> str:
+    def _convert_latex(s: str) -> str:
         return s
 
+def has_latex(s: str) -> bool:
+    return "\\" in s or "$" in s
+
+def latex_to_text(s: str) -> str:
+    # Plain prose has nothing to convert; skip the parser entirely.
+    return _convert_latex(s) if has_latex(s) else s
+
+def latex_lines_to_text(lines: List[str]) -> List[str]:
+    """
+    Convert each line separately so an unbalanced $ or brace in one step can't
+    leak into the next; the shared parser and cache keep this cheap.
+    """
+    return [latex_to_text(line).strip() for line in lines]
+
 
 
 SYSTEM_PROMPT = """You are a Math Olympiad Study Assistant.
@@ -42,24 +76,62 @@ DEFAULT_MODEL = "gpt-5"
 GEMINI_COMPAT_BASE = "https://generativelanguage.googleapis.com/v1beta/openai/"
 OPENROUTER_BASE = "https://openrouter.ai/api/v1"
 PERPLEXITY_BASE = "https://api.perplexity.ai"
+DEFAULT_CONCURRENCY = 8   # in-flight requests in --file-glob mode; tune to provider RPM
+MAX_RETRIES = 5           # attempts on 429 / 5xx / timeouts before giving up
+MAX_PACK = 16             # problems per request with --pack; latency grows past this
+# Connection pool for the shared async client. httpx defaults to 100 connections /
+# 20 keep-alive, which throttles large --file-glob runs well below provider RPM.
+HTTP_LIMITS = httpx.Limits(max_connections=256, max_keepalive_connections=128)
+# Fail fast on hung connects. The read timeout applies per read, including the wait
+# for the first chunk while a reasoning model thinks, so keep the SDK's 600s default.
+HTTP_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+# The SDK only wraps errors raised while opening the request; failures while reading
+# a stream (dropped connection, read timeout) surface as raw httpx.TransportError.
+# An error event sent mid-stream arrives as a plain APIError and is not retried,
+# since it can just as well be a permanent rejection as a transient fault.
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError,
+                    httpx.TransportError)
+
+JSON_MODE = {"response_format": {"type": "json_object"}}
+
+# Model-name prefix -> (base_url, extra chat.completions kwargs).
+# "" is the catch-all: OpenAI default endpoint (or LLM_BASE_URL) with no extra
+# kwargs, since many OpenAI-compatible servers reject response_format.
+PROVIDERS: Dict[str, Tuple[Optional[str], Dict[str, Any]]] = {
+    "gemini": (GEMINI_COMPAT_BASE, JSON_MODE),
+    "gpt": (None, JSON_MODE),
+    "o1": (None, JSON_MODE),
+    "o3": (None, JSON_MODE),
+    "o4": (None, JSON_MODE),
+    "sonar": (PERPLEXITY_BASE, {}),
+    "perplexity/": (OPENROUTER_BASE, {}),
+    "": (None, {}),
+}
+# Longest prefix first so the first startswith() hit is the most specific one.
+_PROVIDER_PREFIXES = sorted(PROVIDERS, key=len, reverse=True)
+
+def provider_for(model: str) -> Tuple[Optional[str], Dict[str, Any]]:
+    m = (model or "").lower().strip()
+    return PROVIDERS[next(p for p in _PROVIDER_PREFIXES if m.startswith(p))]
+
+def forced_base_url() -> Optional[str]:
+    return os.getenv("LLM_BASE_URL", "").strip() or None
 
 def infer_base_url(model: str) -> str | None:
     """
     Auto-select base_url from model name unless LLM_BASE_URL is set.
-    - gemini* -> Google OpenAI-compatible endpoint
-    - otherwise -> default (OpenAI)
+    See PROVIDERS; unknown models use the OpenAI default (None).
     """
-    forced = os.getenv("LLM_BASE_URL", "").strip() or None
-    if forced:
-        return forced
-    m = (model or "").lower().strip()
-    if m.startswith("gemini"):
-        return GEMINI_COMPAT_BASE
-    if m.startswith("sonar"):
-        return PERPLEXITY_BASE    
-    if m.startswith("perplexity/"):
-        return OPENROUTER_BASE
-    return None  # OpenAI default
+    return forced_base_url() or provider_for(model)[0]
+
+def completion_kwargs(model: str) -> Dict[str, Any]:
+    """
+    Extra chat.completions kwargs for model. With LLM_BASE_URL set the server is
+    unknown (vLLM, Ollama, a proxy...), so only the catch-all entry applies.
+    """
+    if forced_base_url():
+        return PROVIDERS[""][1]
+    return provider_for(model)[1]
 
 def make_client_and_model(cli_model: str | None):
     load_dotenv()
@@ -70,59 +142,253 @@ def make_client_and_model(cli_model: str | None):
     model = (cli_model or os.getenv("LLM_MODEL") or DEFAULT_MODEL).strip()
     base_url = infer_base_url(model)
 
-    client = OpenAI(api_key=api_key, base_url=base_url) if base_url else OpenAI(api_key=api_key)
+    # Retries are handled by tenacity in _stream_completion, so the SDK's own are off.
+    http_client = DefaultAsyncHttpxClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+    opts = dict(api_key=api_key, http_client=http_client, timeout=HTTP_TIMEOUT, max_retries=0)
+    if base_url:
+        client = AsyncOpenAI(base_url=base_url, **opts)
+    else:
+        client = AsyncOpenAI(**opts)
     return client, model
 
 def ensure_list(field):
     if isinstance(field, list):
+        if all(type(x) is str for x in field):
+            # Common case: already a list of strings, no str() round-trips needed.
+            return [x.strip() for x in field if x and not x.isspace()]
         return [str(x).strip() for x in field if str(x).strip()]
     if isinstance(field, str):
         return [field.strip()]
     return []
 
-def repair_json(s: str) -> str:
-    """Light fix if JSON comes back with code fences."""
-    s = s.strip()
+def cache_key(model: str, problem_text: str) -> str:
+    return hashlib.blake2b((model + SYSTEM_PROMPT + problem_text).encode("utf-8"), digest_size=16).hexdigest()
+
+def cache_load(key: str) -> Optional[Dict[str, Any]]:
+    path = CACHE_DIR / f"{key}.json"
+    try:
+        data = orjson.loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    # Entries without the full schema (e.g. written by older versions) count as misses.
+    return data if isinstance(data, dict) and all(k in data for k in RESULT_KEYS) else None
+
+def cache_store(key: str, result: Dict[str, Any]) -> None:
+    """Write atomically (temp file + rename) so concurrent solves never see a partial file."""
+    try:
+        write_atomic(CACHE_DIR / f"{key}.json", orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS))
+    except OSError as e:
+        print(f"[warn] could not write cache: {e}", file=sys.stderr)
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Keys listed in SYSTEM_PROMPT; a result missing the core ones is not an answer.
+RESULT_KEYS = ("final_answer", "solution_steps", "chapter_tag", "concepts", "thinking_style",
+               "difficulty", "confidence", "quality_checks", "suggested_practice")
+REQUIRED_KEYS = ("final_answer", "solution_steps")
+
+def parse_json(raw: str) -> Any:
+    """
+    Decode model output. Clean JSON goes straight through orjson; otherwise a
+    leading code fence is dropped and the value starting at the first "{" or
+    "[" is decoded once, ignoring anything after it. Raises JSONDecodeError if
+    that value is malformed; check_result() rejects the wrong shape.
+    """
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        pass
+    s = raw.strip()
     if s.startswith("```"):
-        s = s.strip("`")
-        s = s[s.find("\n") + 1:] if "\n" in s else s
-    start = s.find("{")
-    end = s.rfind("}")
-    return s[start:end+1] if start != -1 and end != -1 else s
-
-def solve(problem_text: str, client, model: str) -> Dict[str, Any]:
-    """Send problem to GPT and return structured JSON."""
+        s = s[s.find("\n") + 1:] if "\n" in s else s.strip("`")
+    starts = [i for i in (s.find("{"), s.find("[")) if i != -1]
+    if not starts:
+        return json.loads(s)  # no object or array found: raise with the decoder's message
+    obj, _ = _JSON_DECODER.raw_decode(s, min(starts))
+    return obj
+
+def check_result(result: Any) -> Dict[str, Any]:
+    """Return result if it looks like a solution object, else raise ValueError."""
+    if not isinstance(result, dict):
+        raise ValueError(f"Expected a JSON object, got {type(result).__name__}.")
+    missing = [k for k in REQUIRED_KEYS if k not in result]
+    if missing:
+        raise ValueError(f"Response is missing required keys: {', '.join(missing)}.")
+    return result
+
+def _log_retry(state) -> None:
+    err = state.outcome.exception()
+    print(f"[warn] {type(err).__name__}: {err}; retrying in {state.next_action.sleep:.1f}s "
+          f"(attempt {state.attempt_number}/{MAX_RETRIES})", file=sys.stderr)
+
+@retry(
+    stop=stop_after_attempt(MAX_RETRIES),
+    wait=wait_random_exponential(multiplier=1, max=30),
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    before_sleep=_log_retry,
+    reraise=True,
+)
+async def _stream_completion(client, kwargs: Dict[str, Any], echo: bool) -> Tuple[str, Any]:
+    """One streamed request; a transient failure mid-stream retries the whole request."""
+    stream = await client.chat.completions.create(
+        stream=True,
+        stream_options={"include_usage": True},
+        **kwargs,
+    )
+
+    # --- accumulate streamed content, echoing tokens as they arrive
+    parts: List[str] = []
+    usage = None
+    try:
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                if echo:
+                    sys.stderr.write(delta)
+                    sys.stderr.flush()
+    except RETRYABLE_ERRORS:
+        if echo and parts:
+            sys.stderr.write("\n[stream interrupted; partial output above is discarded]\n")
+        raise
+    if echo:
+        sys.stderr.write("\n")
+    return "".join(parts), usage
+
+def progress(msg: str, label: Optional[str] = None) -> None:
+    """Status line. Labelled (batch) progress goes to stderr, tagged with its problem file(s)."""
+    if label:
+        print(f"[{label}] {msg}", file=sys.stderr)
+    else:
+        print(msg)
+
+async def complete(messages: List[Dict[str, str]], client, model: str, echo: bool = True,
+                   label: Optional[str] = None) -> str:
+    """Run one streamed chat completion and return the assembled content.
+
+    With echo=True the streamed tokens are mirrored to stderr; batch runs turn
+    this off so concurrent streams don't interleave, and pass a label so their
+    progress lines can be told apart.
+    """
+    kwargs = dict(
+        model=model,
+        messages=messages,
+        **completion_kwargs(model),
+    )
+
+    progress(f"Calling GPT {model}...", label)
+    raw, usage = await _stream_completion(client, kwargs, echo)
+
+    # --- extract token usage (final chunk when include_usage is honoured)
+    if usage is not None and label:
+        progress(f"Tokens: prompt {usage.prompt_tokens}, completion {usage.completion_tokens}, "
+                 f"total {usage.total_tokens}", label)
+    elif usage is not None:
+        print(f"\n--- Token Usage ---")
+        print(f"Prompt tokens:     {usage.prompt_tokens}")
+        print(f"Completion tokens: {usage.completion_tokens}")
+        print(f"Total tokens:      {usage.total_tokens}")
+
+    return raw
+
+async def solve(problem_text: str, client, model: str, echo: bool = True,
+                read_cache: bool = True, label: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Send problem to GPT and return structured JSON, cached on disk by model +
+    prompt + problem. read_cache=False skips the lookup but still stores the
+    fresh result, so a stale entry can be refreshed.
+    """
+    key = cache_key(model, problem_text)
+    if read_cache:
+        cached = cache_load(key)
+        if cached is not None:
+            progress(f"Using cached result ({key}).", label)
+            return cached
+
     msg = [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": problem_text},
     ]
-    kwargs = dict(
-        model=model,
-        messages=msg,
-    )
-    if model.startswith("gemini"):
-        kwargs["response_format"] = {"type": "json_object"}
-
-    print(f"Calling GPT {model}...")
-    resp = client.chat.completions.create(**kwargs)
-
-    # --- extract token usage
-    usage = resp.usage
-    prompt_tokens = usage.prompt_tokens
-    completion_tokens = usage.completion_tokens
-    total_tokens = usage.total_tokens
-
-    print(f"\n--- Token Usage ---")
-    print(f"Prompt tokens:     {prompt_tokens}")
-    print(f"Completion tokens: {completion_tokens}")
-    print(f"Total tokens:      {total_tokens}")
-    
-    raw = resp.choices[0].message.content
+    raw = await complete(msg, client, model, echo=echo, label=label)
     #print(json.dumps(json.loads(raw), indent=2))  # Debug: show raw response
-    try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
-        return json.loads(repair_json(raw))
+    result = check_result(parse_json(raw))
+    if all(k in result for k in RESULT_KEYS):
+        cache_store(key, result)
+    return result
+
+async def solve_batch(problems: List[str], client, model: str, echo: bool = False,
+                      read_cache: bool = True, label: Optional[str] = None) -> List[Any]:
+    """
+    Solve several problems in a single request.
+    The model answers with {"results": [...]}, one object per problem in the
+    same order, each following the SYSTEM_PROMPT schema. Cached problems are
+    left out of the request. An entry that isn't a valid solution object comes
+    back as the ValueError describing it, so one bad entry doesn't sink the rest.
+    """
+    if len(problems) > MAX_PACK:
+        raise ValueError(f"At most {MAX_PACK} problems per request (got {len(problems)}).")
+    keys = [cache_key(model, p) for p in problems]
+    found = [cache_load(k) if read_cache else None for k in keys]
+    todo = [i for i, r in enumerate(found) if r is None]
+    if not todo:
+        return found
+    pending = [problems[i] for i in todo]
+
+    numbered = "\n\n".join(f"{i}) {p}" for i, p in enumerate(pending, 1))
+    msg = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": (
+            "Solve each of the following problems. Return a JSON object "
+            '{"results": [...]} whose array holds one object per problem, in order, '
+            "each with the schema in the system prompt:\n" + numbered
+        )},
+    ]
+    raw = await complete(msg, client, model, echo=echo, label=label)
+    data = parse_json(raw)
+    results = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(results, list) or len(results) != len(pending):
+        got = len(results) if isinstance(results, list) else type(results).__name__
+        raise ValueError(f"Expected {len(pending)} results, got {got}.")
+    for i, result in zip(todo, results):
+        try:
+            found[i] = check_result(result)
+        except ValueError as e:
+            found[i] = e
+            continue
+        if all(k in result for k in RESULT_KEYS):
+            cache_store(keys[i], result)
+    return found
+
+async def solve_many(problems: List[str], client, model: str,
+                     concurrency: int = DEFAULT_CONCURRENCY, pack: int = 1,
+                     read_cache: bool = True, labels: Optional[List[str]] = None) -> List[Any]:
+    """
+    Solve problems concurrently; failures come back as exception objects.
+    With pack > 1, problems are grouped `pack` at a time into one request each.
+    labels (e.g. file paths) tag each request's progress lines on stderr.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+    pack = max(1, min(MAX_PACK, pack))
+    labels = labels or [f"#{i}" for i in range(1, len(problems) + 1)]
+
+    async def _one(group: List[str], names: List[str]) -> List[Any]:
+        label = ", ".join(names)
+        async with sem:
+            try:
+                if len(group) == 1:
+                    return [await solve(problem_text=group[0], client=client, model=model,
+                                        echo=False, read_cache=read_cache, label=label)]
+                return await solve_batch(group, client, model, read_cache=read_cache, label=label)
+            except Exception as e:
+                return [e] * len(group)
+
+    spans = range(0, len(problems), pack)
+    batches = await asyncio.gather(*(_one(problems[i:i + pack], labels[i:i + pack]) for i in spans))
+    return [r for batch in batches for r in batch]
 
 def pretty_print(result: Dict[str, Any], show_latex_raw: bool = False):
     # Extract fields
@@ -141,63 +407,92 @@ def pretty_print(result: Dict[str, Any], show_latex_raw: bool = False):
         final_answer = latex_to_text(str(final_answer))
 
         if isinstance(steps, str):
-            steps = [latex_to_text(line) for line in steps.split("\n") if line.strip()]
+            steps = latex_lines_to_text([line for line in steps.split("\n") if line.strip()])
         elif isinstance(steps, list):
-            steps = [latex_to_text(str(s)) for s in steps if str(s).strip()]
+            steps = latex_lines_to_text([str(s) for s in steps if str(s).strip()])
         else:
             steps = []
 
-    # Print output
-    print("\n=== FINAL ANSWER ===")
-    print(final_answer if final_answer else "(none)")
+    # Build the whole report, then emit it with a single write
+    parts: List[str] = []
+    parts.append("\n=== FINAL ANSWER ===\n")
+    parts.append(f"{final_answer if final_answer else '(none)'}\n")
 
-    print("\n=== SOLUTION STEPS ===")
+    parts.append("\n=== SOLUTION STEPS ===\n")
     if steps:
-        for i, step in enumerate(steps, 1):
-            print(f"{i}. {step}")
+        parts.extend(f"{i}. {step}\n" for i, step in enumerate(steps, 1))
     else:
-        print("(none)")
-
-    print("\n=== CLASSIFICATION ===")
-    print("Chapter:", chapter or "(none)")
-    print("Concepts:", ", ".join(concepts) if concepts else "(none)")
-    print("Thinking:", ", ".join(thinking) if thinking else "(none)")
-    print("Difficulty:", difficulty if difficulty else "(none)")
-    print("Confidence:", confidence if confidence else "(none)")
-
-    print("\n=== QUALITY CHECKS ===")
-    if qchecks:
-        if isinstance(qchecks, str):
-            print("-", qchecks)
-        else:
-            for bullet in qchecks:
-                print("-", bullet)
-    else:
-        print("(none)")
+        parts.append("(none)\n")
+
+    parts.append("\n=== CLASSIFICATION ===\n")
+    parts.append(f"Chapter: {chapter or '(none)'}\n")
+    parts.append(f"Concepts: {', '.join(concepts) if concepts else '(none)'}\n")
+    parts.append(f"Thinking: {', '.join(thinking) if thinking else '(none)'}\n")
+    parts.append(f"Difficulty: {difficulty if difficulty else '(none)'}\n")
+    parts.append(f"Confidence: {confidence if confidence else '(none)'}\n")
 
-    print("\n=== SUGGESTED PRACTICE ===")
-    if practice:
-        if isinstance(practice, str):
-            print("-", practice)
+    for title, bullets in (("QUALITY CHECKS", qchecks), ("SUGGESTED PRACTICE", practice)):
+        parts.append(f"\n=== {title} ===\n")
+        if bullets:
+            if isinstance(bullets, str):
+                parts.append(f"- {bullets}\n")
+            else:
+                parts.extend(f"- {b}\n" for b in bullets)
         else:
-            for s in practice:
-                print("-", s)
-    else:
-        print("(none)")
+            parts.append("(none)\n")
 
-def main():
-    parser = argparse.ArgumentParser(description="Math Olympiad CLI Agent")
-    parser.add_argument("--latex-raw", action="store_true",
-                        help="Print raw LaTeX instead of converting to plaintext.")
-    parser.add_argument("--file", type=str, default=None,
-                        help="Read problem from a file instead of stdin.")
-    parser.add_argument("--model", type=str, default=None,
-                        help=f"Override model (default from .env)")
-    args = parser.parse_args()
+    sys.stdout.write("".join(parts))
+
+def read_problem_file(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+async def run(args) -> int:
+    client, model = make_client_and_model(args.model)
+
+    if args.file_glob:
+        paths = sorted(glob.glob(args.file_glob))
+        if not paths:
+            print(f"No problems matched {args.file_glob!r}. Exiting.")
+            return 1
+
+        # Unreadable and empty files are reported with the rest instead of aborting the batch.
+        outcomes: Dict[str, Any] = {}
+        problems = []
+        for path in paths:
+            try:
+                text = read_problem_file(path)
+            except (OSError, UnicodeDecodeError) as e:
+                outcomes[path] = e
+                continue
+            if not text:
+                outcomes[path] = ValueError("empty problem file")
+                continue
+            problems.append((path, text))
+
+        if problems:
+            results = await solve_many([text for _, text in problems], client, model,
+                                       concurrency=args.concurrency, pack=args.pack,
+                                       read_cache=not args.no_cache,
+                                       labels=[path for path, _ in problems])
+            outcomes.update(zip((path for path, _ in problems), results))
+
+        failed = 0
+        for path in paths:
+            result = outcomes[path]
+            print(f"\n##### {path} #####")
+            if not isinstance(result, BaseException):
+                try:
+                    pretty_print(result, show_latex_raw=args.latex_raw)
+                    continue
+                except Exception as e:
+                    result = e
+            failed += 1
+            print(f"[error] {type(result).__name__}: {result}")
+        return 1 if failed else 0
 
     if args.file:
-        with open(args.file, "r", encoding="utf-8") as f:
-            problem = f.read().strip()
+        problem = read_problem_file(args.file)
     else:
         if sys.stdin.isatty():
             print("Paste a single problem, then Ctrl-D (Linux/macOS) or Ctrl-Z Enter (Windows):")
@@ -205,12 +500,31 @@ def main():
 
     if not problem:
         print("No problem provided. Exiting.")
-        sys.exit(1)
-
-    client, model = make_client_and_model(args.model)
+        return 1
 
-    result = solve(problem_text=problem, client=client, model=model)
+    result = await solve(problem_text=problem, client=client, model=model, read_cache=not args.no_cache)
     pretty_print(result, show_latex_raw=args.latex_raw)
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Math Olympiad CLI Agent")
+    parser.add_argument("--latex-raw", action="store_true",
+                        help="Print raw LaTeX instead of converting to plaintext.")
+    parser.add_argument("--file", type=str, default=None,
+                        help="Read problem from a file instead of stdin.")
+    parser.add_argument("--file-glob", type=str, default=None,
+                        help="Solve every problem file matching this glob concurrently (e.g. 'problems/*.txt').")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Max in-flight requests in --file-glob mode (default {DEFAULT_CONCURRENCY}).")
+    parser.add_argument("--pack", type=int, default=1,
+                        help=f"In --file-glob mode, send up to this many problems per request (max {MAX_PACK}).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Skip the on-disk result cache (~/.cache/imo_agent) and overwrite it with a fresh answer.")
+    parser.add_argument("--model", type=str, default=None,
+                        help=f"Override model (default from .env)")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run(args)))
 
 if __name__ == "__main__":
     main()
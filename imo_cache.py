@@ -0,0 +1,29 @@
+"""
+On-disk cache helpers shared by agent.py and youtube_transcript_downloader.py.
+
+Env:
+    - IMO_AGENT_CACHE_DIR overrides the cache root (default ~/.cache/imo_agent).
+"""
+import os
+import pathlib
+import tempfile
+
+CACHE_DIR = pathlib.Path(os.getenv("IMO_AGENT_CACHE_DIR") or pathlib.Path.home() / ".cache" / "imo_agent")
+
+def write_atomic(path: pathlib.Path, data: bytes) -> None:
+    """
+    Write data to path via a temp file + rename so readers never see a partial
+    file. The temp file is removed if anything fails; errors are re-raised.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
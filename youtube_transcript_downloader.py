@@ -28,9 +28,16 @@ import argparse
 import pathlib
 import re
 import shlex
+import hashlib
 import subprocess
-from typing import Dict, Any, List, Optional
+import urllib.parse
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Try to load .env if available (don't require it)
 try:
@@ -39,6 +46,25 @@ try:
 except Exception:
     pass
 
+# Imported after .env is loaded so IMO_AGENT_CACHE_DIR set there is honoured.
+import imo_cache
+from imo_cache import write_atomic
+
+# One keep-alive session for all API calls; retries transient 429/5xx with backoff.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                      raise_on_status=False),  # let raise_for_status() report the final response
+))
+
+CACHE_DIR = imo_cache.CACHE_DIR / "youtube"
+
+def _search_cache_path(query: str, max_results: int, region_code: Optional[str]) -> pathlib.Path:
+    raw = json.dumps([query, max_results, region_code or ""])
+    return CACHE_DIR / f"{hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()}.json"
+
 def get_api_key() -> str:
     key = os.getenv("YOUTUBE_API_KEY") or os.getenv("GOOGLE_API_KEY")
     if not key:
@@ -48,7 +74,19 @@ def get_api_key() -> str:
         )
     return key
 
-def search_youtube(query: str, api_key: str, max_results: int = 5, region_code: Optional[str] = None) -> List[Dict[str, Any]]:
+def search_youtube(query: str, api_key: str, max_results: int = 5, region_code: Optional[str] = None,
+                   read_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    Search YouTube; results are cached on disk per (query, max_results, region_code)
+    to save API quota. read_cache=False forces a fresh search and refreshes the cache.
+    """
+    cache_path = _search_cache_path(query, max_results, region_code)
+    if read_cache:
+        try:
+            return orjson.loads(cache_path.read_bytes())
+        except (OSError, ValueError):
+            pass
+
     url = "https://www.googleapis.com/youtube/v3/search"
     params = {
         "part": "snippet",
@@ -62,7 +100,7 @@ def search_youtube(query: str, api_key: str, max_results: int = 5, region_code:
     if region_code:
         params["regionCode"] = region_code
 
-    r = requests.get(url, params=params, timeout=30)
+    r = _SESSION.get(url, params=params, timeout=30)
     r.raise_for_status()
     data = r.json()
 
@@ -78,101 +116,172 @@ def search_youtube(query: str, api_key: str, max_results: int = 5, region_code:
             "published_at": sn.get("publishedAt", ""),
             "url": f"https://www.youtube.com/watch?v={vid}",
         })
+
+    try:
+        write_atomic(cache_path, orjson.dumps(results))
+    except OSError as e:
+        print(f"[warn] could not write search cache: {e}", file=sys.stderr)
     return results
 
-def _score_candidate(title: str, description: str, query: str) -> float:
-    t = title.lower()
-    d = description.lower()
+_PROBLEM_RE = re.compile(r"problem\s*(\d+)")
+_YEAR_RE = re.compile(r"(?:19|20)\d{2}")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_IMO_KEYWORDS = ("imo", "international mathematical olympiad")
+
+def _query_context(query: str) -> Dict[str, Any]:
+    """Everything _score needs from the query, computed once per search rather than per candidate."""
     q = query.lower()
+    m_prob = _PROBLEM_RE.search(q)
+    m_year = _YEAR_RE.search(q)
+    p = m_prob.group(1) if m_prob else None
+    return {
+        "problem": p,
+        "problem_word_re": re.compile(rf"\b{p}\b") if p else None,
+        "problem_markers": (f"p{p}", f"#{p}") if p else (),
+        "year": m_year.group(0) if m_year else None,
+        "tokens": frozenset(_TOKEN_RE.findall(q)),
+    }
+
+def _score(title: str, t: str, d: str, ctx: Dict[str, Any]) -> float:
+    """Score one candidate; t and d are the lowercased title and description."""
     score = 0.0
-    for kw in ["imo", "international mathematical olympiad"]:
+    for kw in _IMO_KEYWORDS:
         if kw in t: score += 4
         if kw in d: score += 1
-    m_prob = re.search(r"problem\s*(\d+)", q)
-    if m_prob:
-        p = m_prob.group(1)
+    p = ctx["problem"]
+    if p:
         if f"problem {p}" in t: score += 4
-        if re.search(rf"\b{p}\b", t): score += 1
-        if f"p{p}" in t: score += 1
-        if f"#{p}" in t: score += 1
-    m_year = re.search(r"(19|20)\d{2}", q)
-    if m_year:
-        y = m_year.group(0)
+        if ctx["problem_word_re"].search(t): score += 1
+        for marker in ctx["problem_markers"]:
+            if marker in t: score += 1
+    y = ctx["year"]
+    if y:
         if y in t: score += 3
         if y in d: score += 1
     score += max(0, 3 - len(title) / 50)
-    for token in set(re.findall(r"[a-z0-9]+", q)):
+    for token in ctx["tokens"]:
         if token in t: score += 0.3
     return score
 
-def pick_best(candidates: List[Dict[str, Any]], query: str) -> Optional[Dict[str, Any]]:
-    if not candidates:
-        return None
-    scored = [(c, _score_candidate(c["title"], c.get("description",""), query)) for c in candidates]
+def rank_candidates(candidates: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+    """Candidates ordered best first."""
+    ctx = _query_context(query)
+    scored = [
+        (c, _score(c["title"], c["title"].lower(), c.get("description", "").lower(), ctx))
+        for c in candidates
+    ]
     scored.sort(key=lambda x: x[1], reverse=True)
-    return scored[0][0]
+    return [c for c, _ in scored]
+
+def pick_best(candidates: List[Dict[str, Any]], query: str) -> Optional[Dict[str, Any]]:
+    ranked = rank_candidates(candidates, query)
+    return ranked[0] if ranked else None
+
+_EN_CODES = ("en", "en-US", "en-GB")
+
+def _segments_to_text(segments) -> str:
+    # Old releases yield dicts, 1.x yields snippet objects with a .text attribute.
+    texts = (seg.get("text", "") if isinstance(seg, dict) else getattr(seg, "text", "") for seg in segments)
+    return "\n".join(t for t in texts if t).strip()
+
+def _pick_english(by_code: Dict[str, Any]) -> Optional[Any]:
+    for code in _EN_CODES:
+        if code in by_code:
+            return by_code[code]
+    return next((t for code, t in by_code.items() if code.startswith("en")), None)
 
 def get_transcript_text(video_id: str) -> Optional[str]:
     """
     Robust transcript fetch via youtube-transcript-api.
-    Tries manual EN, generated EN, then translates first available to EN.
-    Handles older API oddities and XML parse failures.
+    The transcript list is read once and indexed by language code; the best
+    option (manual EN, generated EN, else first translatable -> EN) is then
+    fetched with a single network call.
     """
     try:
-        from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound  # type: ignore
+        from youtube_transcript_api import YouTubeTranscriptApi  # type: ignore
     except Exception:
         print("[warn] youtube-transcript-api not installed; cannot fetch transcript.", file=sys.stderr)
         return None
 
     try:
-        list_obj = YouTubeTranscriptApi.list_transcripts(video_id)
+        legacy_list = getattr(YouTubeTranscriptApi, "list_transcripts", None)
+        list_obj = legacy_list(video_id) if legacy_list else YouTubeTranscriptApi().list(video_id)
     except Exception as e:
         print(f"[warn] list_transcripts failed: {e}", file=sys.stderr)
         list_obj = None
 
     if list_obj:
-        # Try manual EN
-        for pref in (["en"], ["en-US", "en-GB"]):
-            try:
-                tran_obj = list_obj.find_transcript(pref)
-                tran = tran_obj.fetch()
-                text = "\n".join([seg.get("text", "") for seg in tran if seg.get("text")]).strip()
-                if text:
-                    return text
-            except Exception as e:
-                # XML parse / empty -> continue
-                continue
-        # Try generated EN
+        transcripts = list(list_obj)
+        manual = {t.language_code: t for t in transcripts if not t.is_generated}
+        generated = {t.language_code: t for t in transcripts if t.is_generated}
+        choice = _pick_english(manual) or _pick_english(generated)
         try:
-            tran_obj = list_obj.find_generated_transcript(["en","en-US","en-GB"])
-            tran = tran_obj.fetch()
-            text = "\n".join([seg.get("text", "") for seg in tran if seg.get("text")]).strip()
+            if choice is not None:
+                tran = choice.fetch()
+            else:
+                first = next((t for t in transcripts if t.is_translatable), None)
+                tran = first.translate("en").fetch() if first is not None else []
+            text = _segments_to_text(tran)
             if text:
                 return text
         except Exception as e:
-            pass
-        # Translate first available to EN
+            print(f"[warn] transcript fetch failed: {e}", file=sys.stderr)
+
+    # Final legacy attempt: some very old installs only had get_transcript
+    get_transcript = getattr(YouTubeTranscriptApi, "get_transcript", None)
+    if get_transcript is not None:
         try:
-            first = next(iter(list_obj), None)
-            if first is not None:
-                tran = first.translate("en").fetch()
-                text = "\n".join([seg.get("text", "") for seg in tran if seg.get("text")]).strip()
-                if text:
-                    return text
+            text = _segments_to_text(get_transcript(video_id, languages=list(_EN_CODES)))
+            if text:
+                return text
         except Exception as e:
             pass
 
-    # Final legacy attempt: some very old installs only had get_transcript
+    return None
+
+def _fetch_into(fut: Future, video_id: str) -> None:
     try:
-        tran = YouTubeTranscriptApi.get_transcript(video_id, languages=["en","en-US","en-GB"])
-        text = "\n".join([seg.get("text","") for seg in tran if seg.get("text")]).strip()
-        if text:
-            return text
+        fut.set_result(get_transcript_text(video_id))
     except Exception as e:
-        pass
+        fut.set_exception(e)
 
+def race_transcripts(videos: List[Dict[str, Any]]) -> Optional[Tuple[Dict[str, Any], str]]:
+    """
+    Fetch transcripts for several candidates in parallel and return the
+    highest-ranked (video, transcript) that succeeds. Results are resolved in
+    rank order, so a lower-ranked hit only wins once every candidate above it
+    has failed; the answer never depends on which request finished first.
+
+    youtube-transcript-api is blocking, so each lookup runs in its own daemon
+    thread. Lookups still in flight when a winner is found are abandoned and
+    do not hold up interpreter exit.
+    """
+    futures = []
+    for v in videos:
+        fut: Future = Future()
+        threading.Thread(target=_fetch_into, args=(fut, v["video_id"]), daemon=True).start()
+        futures.append(fut)
+
+    for video, fut in zip(videos, futures):
+        try:
+            text = fut.result()
+        except Exception as e:
+            print(f"[warn] transcript lookup failed for {video['video_id']}: {e}", file=sys.stderr)
+            continue
+        if text:
+            return video, text
     return None
 
+_SUBS_WRITTEN_RE = re.compile(r"Writing video subtitles to:\s*(.+\.vtt)\s*$", re.M)
+
+def video_id_from_url(video_url: str) -> Optional[str]:
+    """Extract the id from youtube.com/watch?v=ID or youtu.be/ID URLs."""
+    u = urllib.parse.urlparse(video_url)
+    if u.netloc.endswith("youtu.be"):
+        return u.path.lstrip("/") or None
+    ids = urllib.parse.parse_qs(u.query).get("v")
+    return ids[0] if ids else None
+
 def run_yt_dlp_auto_sub(video_url: str, outdir: pathlib.Path, cookies: Optional[str] = None) -> Optional[pathlib.Path]:
     """
     Use yt-dlp to fetch auto-captions (en) without downloading the video.
@@ -191,7 +300,7 @@ def run_yt_dlp_auto_sub(video_url: str, outdir: pathlib.Path, cookies: Optional[
         cmd.extend(["--cookies", cookies])
 
     try:
-        subprocess.run(cmd, check=True, cwd=str(outdir), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        proc = subprocess.run(cmd, check=True, cwd=str(outdir), capture_output=True, text=True)
     except FileNotFoundError:
         print("[warn] yt-dlp not installed. Install with: pip install yt-dlp", file=sys.stderr)
         return None
@@ -199,33 +308,52 @@ def run_yt_dlp_auto_sub(video_url: str, outdir: pathlib.Path, cookies: Optional[
         print(f"[warn] yt-dlp failed: {e}", file=sys.stderr)
         return None
 
-    # Find a .en.vtt (or any .vtt if lang marker absent)
-    for p in outdir.glob("*.vtt"):
-        return p
+    # Look only for this video's file, so stale .vtt files from earlier runs are never picked up.
+    vid = video_id_from_url(video_url)
+    if vid:
+        for p in (outdir / f"{vid}.en.vtt", outdir / f"{vid}.vtt"):
+            if p.exists():
+                return p
+    m = _SUBS_WRITTEN_RE.search(proc.stdout or "")
+    if m:
+        p = outdir / m.group(1).strip()
+        if p.exists():
+            return p
     return None
 
-def vtt_to_txt(vtt_path: pathlib.Path) -> str:
-    """Convert WEBVTT to plain text lines; drop timestamps and cues."""
-    import re
-    lines = []
-    for line in vtt_path.read_text(encoding="utf-8", errors="ignore").splitlines():
-        if line.strip().startswith("WEBVTT"):
-            continue
-        if line.strip().isdigit():
-            continue
-        if re.match(r"^\d{2}:\d{2}:\d{2}\.\d{3} -->", line):
-            continue
-        if line.strip():
-            lines.append(line.strip())
-    return "\n".join(lines).strip()
+_VTT_TS_RE = re.compile(r"^\d{2}:\d{2}:\d{2}\.\d{3} -->")
+
+def iter_vtt_lines(vtt_path: pathlib.Path) -> Iterator[str]:
+    """Yield the caption text lines of a WEBVTT file; drop the header, cue numbers and timestamps."""
+    with open(vtt_path, encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            text = line.strip()
+            if not text or text.startswith("WEBVTT") or text.isdigit():
+                continue
+            if _VTT_TS_RE.match(line):
+                continue
+            yield text
+
+def vtt_to_txt(vtt_path: pathlib.Path, txt_path: pathlib.Path) -> int:
+    """
+    Convert WEBVTT to plain text, streaming line by line into txt_path so memory
+    stays O(line) even for hour-long captions. Returns the number of lines written.
+    """
+    n = 0
+    with open(txt_path, "w", encoding="utf-8") as out:
+        for text in iter_vtt_lines(vtt_path):
+            if n:
+                out.write("\n")
+            out.write(text)
+            n += 1
+    return n
 
 def save_outputs(outdir: pathlib.Path, video: Dict[str, Any], transcript: Optional[str]) -> Dict[str, str]:
     outdir.mkdir(parents=True, exist_ok=True)
     vid = video["video_id"]
     meta_path = outdir / f"{vid}.json"
     txt_path = outdir / f"{vid}.txt"
-    with meta_path.open("w", encoding="utf-8") as f:
-        json.dump(video, f, ensure_ascii=False, indent=2)
+    meta_path.write_bytes(orjson.dumps(video, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     if transcript:
         with txt_path.open("w", encoding="utf-8") as f:
             f.write(transcript)
@@ -239,45 +367,60 @@ def main():
     ap.add_argument("--region", default=None, help="Optional ISO region code (e.g., IN, US).")
     ap.add_argument("--fallback", choices=["none","yt-dlp"], default="yt-dlp", help="Fallback method if API transcript unavailable.")
     ap.add_argument("--cookies", default=None, help="Path to cookies file for yt-dlp (export from your browser).")
+    ap.add_argument("--no-cache", action="store_true", help="Search again instead of using cached results (the cache is refreshed).")
+    ap.add_argument("--race", type=int, default=3, help="Try transcripts for the top N candidates in parallel; keep the highest-ranked one found.")
     args = ap.parse_args()
 
     api_key = get_api_key()
-    candidates = search_youtube(args.query, api_key, max_results=args.max, region_code=args.region)
+    candidates = search_youtube(args.query, api_key, max_results=args.max, region_code=args.region,
+                                read_cache=not args.no_cache)
     if not candidates:
         raise SystemExit("No videos found for that query. Try adjusting your search.")
 
-    best = pick_best(candidates, args.query)
-    if not best:
+    ranked = rank_candidates(candidates, args.query)
+    if not ranked:
         raise SystemExit("Couldn't rank candidates.")
+    best = ranked[0]
 
     print(f"Best match:\n  Title : {best['title']}\n  Channel: {best['channel_title']}\n  URL   : {best['url']}\n  Published: {best['published_at']}")
 
-    transcript = get_transcript_text(best["video_id"])
-    if transcript:
+    outdir = pathlib.Path(args.outdir)
+    vtt_written = False
+    transcript = None
+    found = race_transcripts(ranked[:max(1, args.race)])
+    if found:
+        video, transcript = found
+        if video is not best:
+            best = video
+            print(f"\nNo transcript for the best match; using the next-ranked candidate with one:\n  Title : {best['title']}\n  URL   : {best['url']}")
         print(f"\nTranscript: found via youtube-transcript-api ({len(transcript.split())} words). Saving...")
     else:
         print("\nTranscript: not available or failed via API.")
         if args.fallback == "yt-dlp":
             print("Trying yt-dlp auto-captions fallback...")
-            vtt_path = run_yt_dlp_auto_sub(best["url"], pathlib.Path(args.outdir), args.cookies)
+            txt_path = outdir / f"{best['video_id']}.txt"
+            vtt_path = run_yt_dlp_auto_sub(best["url"], outdir, args.cookies)
             if vtt_path and vtt_path.exists():
                 try:
-                    transcript = vtt_to_txt(vtt_path)
-                    if transcript:
+                    vtt_written = vtt_to_txt(vtt_path, txt_path) > 0
+                    if vtt_written:
                         print(f"yt-dlp fallback succeeded: {vtt_path.name}")
                     else:
                         print("yt-dlp fallback produced empty transcript.")
                 except Exception as e:
                     print(f"[warn] Failed to parse VTT: {e}")
+                if not vtt_written:
+                    txt_path.unlink(missing_ok=True)
 
-    paths = save_outputs(pathlib.Path(args.outdir), best, transcript)
+    paths = save_outputs(outdir, best, transcript)
     print(f"\nSaved:\n  Metadata : {paths['meta']}")
     if transcript:
         print(f"  Transcript: {paths['transcript']}")
+    elif vtt_written:
+        print(f"  Transcript: {txt_path}")
 
-    list_path = pathlib.Path(args.outdir) / "search_results.json"
-    with list_path.open("w", encoding="utf-8") as f:
-        json.dump(candidates, f, ensure_ascii=False, indent=2)
+    list_path = outdir / "search_results.json"
+    list_path.write_bytes(orjson.dumps(candidates, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     print(f"  All search results: {list_path}")
 
 if __name__ == "__main__":